@@ -0,0 +1,321 @@
+"""
+Benchmarks for the degrees search code.
+
+Besides micro-benchmarks of the frontiers and data stores, this can
+generate synthetic datasets in the same CSV layout as `small/` and run a
+fixed, seeded suite of queries against them, emitting JSON results that
+can be compared across revisions.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import degrees
+from graph import Graph
+from util import (Node, StackFrontier, QueueFrontier,
+                  IndexedStackFrontier, IndexedQueueFrontier)
+
+FRONTIERS = [
+    ("StackFrontier", StackFrontier),
+    ("IndexedStackFrontier", IndexedStackFrontier),
+    ("QueueFrontier", QueueFrontier),
+    ("IndexedQueueFrontier", IndexedQueueFrontier),
+]
+
+
+def explore(frontier_class, source, limit):
+    """
+    Runs the search loop of `shortest_path` from `source` without a goal,
+    using `frontier_class`, until `limit` people have been expanded.
+    Returns the number of people expanded.
+    """
+    frontier = frontier_class()
+    frontier.add(Node(source, None, None))
+    explored = set()
+    while not frontier.empty() and len(explored) < limit:
+        node = frontier.remove()
+        explored.add(node.state)
+        for movie, person in degrees.neighbors_for_person(node.state):
+            if not frontier.contains_state(person) and person not in explored:
+                frontier.add(Node(person, node, movie))
+    return len(explored)
+
+
+def benchmark_frontiers(sources, limit):
+    """
+    Times every frontier implementation exploring from each of `sources`.
+    Returns a list of (name, seconds, expanded) tuples.
+    """
+    results = []
+    for name, frontier_class in FRONTIERS:
+        expanded = 0
+        start = time.perf_counter()
+        for source in sources:
+            expanded += explore(frontier_class, source, limit)
+        results.append((name, time.perf_counter() - start, expanded))
+    return results
+
+
+def benchmark_memory(directory):
+    """
+    Measures memory held by the dictionary store and by the compact
+    `Graph` store for the data in `directory`.
+    Returns a list of (name, seconds, bytes) tuples.
+    """
+    results = []
+    for name, load in [("dictionaries", load_dictionaries),
+                       ("compact graph", Graph.from_csv)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        data = load(directory)
+        seconds = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del data
+        results.append((name, seconds, size))
+    return results
+
+
+def load_dictionaries(directory):
+    """
+    Loads `directory` into fresh degrees dictionaries and returns them.
+    """
+    degrees.names, degrees.people, degrees.movies = {}, {}, {}
+    degrees.load_data(directory)
+    data = (degrees.names, degrees.people, degrees.movies)
+    degrees.names, degrees.people, degrees.movies = {}, {}, {}
+    return data
+
+
+# Search modes run by the suite, as keyword arguments to find_path
+SEARCH_MODES = {
+    "bfs": {},
+    "bidirectional": {"bidirectional": True},
+    "astar": {"astar": True},
+}
+
+FIRST_NAMES = ["Ada", "Ben", "Cora", "Dev", "Eli", "Fay", "Gus", "Hana",
+               "Ivo", "Jun", "Kai", "Lena", "Milo", "Nia", "Omar", "Pia",
+               "Quin", "Rosa", "Sam", "Tess", "Uma", "Vic", "Wren", "Yara"]
+SYLLABLES = ["ba", "ko", "ri", "ne", "sa", "tu", "lo", "mi", "da", "ve",
+             "ga", "zo", "pe", "hu", "ya", "an", "el", "or"]
+
+
+def generate_dataset(directory, stars, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with about `stars` star
+    rows to `directory`. Each movie has a small cast drawn with a skew
+    towards a minority of prolific people, as in the real data.
+    """
+    rng = random.Random(seed)
+    movies_count = max(1, stars // 5)
+    people_count = max(2, stars // 4, -(-stars // movies_count))
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        f.write("id,name,birth\n")
+        for person in range(people_count):
+            last = "".join(rng.choice(SYLLABLES)
+                           for _ in range(rng.randint(2, 4))).capitalize()
+            name = f"{rng.choice(FIRST_NAMES)} {last}"
+            f.write(f'{person + 1},"{name}",{rng.randint(1900, 2005)}\n')
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        f.write("id,title,year\n")
+        for movie in range(movies_count):
+            f.write(f'{movie + 1000000},"Movie {movie + 1}",'
+                    f'{rng.randint(1920, 2020)}\n')
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        f.write("person_id,movie_id\n")
+        cast = set()
+        for i in range(stars):
+            movie = i * movies_count // stars
+            if i and movie != (i - 1) * movies_count // stars:
+                cast.clear()
+
+            # Draw each cast without replacement, as nobody stars twice
+            # in one movie
+            person = int(people_count * rng.random() ** 2)
+            while person in cast:
+                person = int(people_count * rng.random() ** 2)
+            cast.add(person)
+            f.write(f"{person + 1},{movie + 1000000}\n")
+
+
+def percentile(values, fraction):
+    """
+    Returns the `fraction` percentile of sorted `values`.
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def array_bytes(*arrays):
+    """
+    Returns the total size in bytes of the buffers of `arrays`.
+    """
+    return sum(memoryview(values).nbytes for values in arrays)
+
+
+def run_suite(directory, queries=100, seed=0, compact=False, modes=None,
+              landmark_count=8, costars=False):
+    """
+    Loads `directory`, answers `queries` seeded random pairs with every
+    search mode and returns a JSON-serializable dict of load time,
+    latency percentiles, people expanded and peak memory.
+
+    With `costars` (compact store only), the co-star adjacency is built
+    first and its build time and size are reported next to the size of
+    the star graph it is derived from.
+    """
+    modes = modes or list(SEARCH_MODES)
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact, cache=False)
+    load_seconds = time.perf_counter() - start
+
+    costar_report = None
+    if costars:
+        graph = degrees.graph
+        start = time.perf_counter()
+        graph.build_costars()
+        costar_report = {
+            "seconds": time.perf_counter() - start,
+            "edges": len(graph.costar_people),
+            "bytes": array_bytes(graph.costar_offsets, graph.costar_people,
+                                 graph.costar_movies),
+            "star_graph_bytes": array_bytes(
+                graph.person_offsets, graph.person_movies,
+                graph.movie_offsets, graph.movie_stars),
+        }
+
+    # Landmarks are only prepared, and timed, if A* is benchmarked
+    landmark_seconds = None
+    if "astar" in modes:
+        start = time.perf_counter()
+        degrees.build_landmarks(landmark_count)
+        landmark_seconds = time.perf_counter() - start
+
+    if degrees.graph is not None:
+        person_ids = list(degrees.graph.person_ids)
+    else:
+        person_ids = sorted(degrees.people)
+    rng = random.Random(seed)
+    pairs = [tuple(rng.sample(person_ids, 2)) for _ in range(queries)]
+
+    results = {}
+    for mode in modes:
+        latencies = []
+        expanded = []
+        connected = 0
+        for source, target in pairs:
+            stats = {}
+            start = time.perf_counter()
+            path = degrees.find_path(source, target, stats=stats,
+                                     **SEARCH_MODES[mode])
+            latencies.append(time.perf_counter() - start)
+            expanded.append(stats.get("expanded", 0))
+            connected += path is not None
+        latencies.sort()
+        results[mode] = {
+            "connected": connected,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p90": percentile(latencies, 0.9),
+            "latency_p99": percentile(latencies, 0.99),
+            "latency_max": latencies[-1] if latencies else None,
+            "expanded_mean": statistics.mean(expanded) if expanded else 0,
+            "expanded_max": max(expanded, default=0),
+        }
+
+    return {
+        "directory": directory,
+        "store": "compact" if compact else "dictionaries",
+        "people": len(person_ids),
+        "queries": queries,
+        "seed": seed,
+        "load_seconds": load_seconds,
+        "landmark_seconds": landmark_seconds,
+        "costars": costar_report,
+        "peak_memory": degrees.peak_memory(),
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the degrees search code.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--sources", type=int, default=5,
+                        help="number of random start people")
+    parser.add_argument("--limit", type=int, default=20000,
+                        help="maximum people expanded per start")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true",
+                        help="compare memory of the data stores instead")
+    parser.add_argument("--generate", type=int, metavar="STARS",
+                        help="write a synthetic dataset of about STARS "
+                             "star rows to the directory instead")
+    parser.add_argument("--suite", action="store_true",
+                        help="run the seeded query suite and print JSON")
+    parser.add_argument("--queries", type=int, default=100,
+                        help="number of queries in the suite")
+    parser.add_argument("--compact", action="store_true",
+                        help="run the suite on the compact graph store")
+    parser.add_argument("--mode", action="append", choices=SEARCH_MODES,
+                        help="search mode to run in the suite "
+                             "(default: all)")
+    parser.add_argument("--costars", action="store_true",
+                        help="with --compact, build the co-star adjacency "
+                             "before the suite")
+    parser.add_argument("--landmarks", type=int, default=8,
+                        help="number of landmarks for the astar mode")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write suite results to FILE instead of stdout")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_dataset(args.directory, args.generate, args.seed)
+        return
+    if args.costars and not args.compact:
+        parser.error("--costars requires --compact")
+    if args.suite:
+        results = run_suite(args.directory, args.queries, args.seed,
+                            args.compact, args.mode, args.landmarks,
+                            args.costars)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+        return
+
+    if args.memory:
+        for name, seconds, size in benchmark_memory(args.directory):
+            print(f"{name:>22}: {size / 2 ** 20:8.1f} MiB, "
+                  f"loaded in {seconds:.3f}s")
+        return
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    rng = random.Random(args.seed)
+    sources = rng.sample(sorted(degrees.people), min(args.sources,
+                                                     len(degrees.people)))
+    for name, seconds, expanded in benchmark_frontiers(sources, args.limit):
+        print(f"{name:>22}: {seconds:8.3f}s for {expanded} expansions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,23 @@
+import argparse
 import csv
+import gc
+import json
+import multiprocessing
+import os
+import socketserver
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+import time
+from collections import Counter, deque
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from graph import (Graph, landmark_heuristic, search_astar,
+                   search_bidirectional)
+from nameindex import NameIndex, EXACT, PREFIX, FUZZY
+from pathcache import MISS, PathCache
+from snapshot import load_snapshot, save_snapshot
+from util import Node, StackFrontier, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +28,56 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of people and movies if loaded
+graph = None
+
+# Optional PathCache consulted by shortest_path
+path_cache = None
+
+# NameIndex over the loaded names, built on first use
+name_index = None
+
+# Whether resolve_person picks the best ranked person for ambiguous names
+# instead of failing
+resolve_best_match = False
+
+# Distance dicts of the landmarks used by A* search in dictionary mode
+landmarks = []
 
-def load_data(directory):
+# Arguments of the last load_data call, so spawned workers can reload
+loaded = None
+
+
+def load_data(directory, compact=False, cache=True, landmark_count=0,
+              costars=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, the star graph is stored in a `Graph`
+    instead of the `names`, `people` and `movies` dictionaries.
+    With `cache`, the graph is read from a binary snapshot next to
+    the CSV files when it is up to date, and written there otherwise.
+    With `landmark_count`, that many landmarks are prepared for A* search.
+    With `costars`, the compact graph precomputes deduplicated co-stars.
     """
+    global graph, loaded, name_index
+    loaded = (directory, compact, cache, landmark_count, costars)
+    name_index = None
+    if compact:
+        graph = load_snapshot(directory) if cache else None
+        changed = graph is None
+        if graph is None:
+            graph = Graph.from_csv(directory)
+        if costars and not len(graph.costar_offsets):
+            graph.build_costars()
+            changed = True
+        if landmark_count and len(graph.landmarks) != landmark_count:
+            graph.build_landmarks(landmark_count)
+            changed = True
+        if cache and changed:
+            save_snapshot(directory, graph)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,16 +112,105 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    if landmark_count:
+        build_landmarks(landmark_count)
 
-def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+def peak_memory():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where the platform does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people and meet in the middle")
+    parser.add_argument("--astar", action="store_true",
+                        help="search with A* guided by landmark distances")
+    parser.add_argument("--landmarks", type=int, default=None,
+                        help="number of landmarks for --astar (default 8)")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in compact integer arrays")
+    parser.add_argument("--costars", action="store_true",
+                        help="with --compact, precompute deduplicated "
+                             "co-stars")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="do not read or write the compact snapshot")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated pairs from FILE "
+                             "('-' for stdin) as JSON lines")
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="answer queries over HTTP until interrupted")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="answer queries over a Unix socket "
+                             "until interrupted")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes answering batch queries "
+                             "(0 for one per core)")
+    parser.add_argument("--histogram", metavar="NAME",
+                        help="print how many people are each number of "
+                             "degrees away from NAME")
+    parser.add_argument("--to", metavar="NAME", action="append", default=[],
+                        help="with --histogram, also print the path to NAME")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="cache up to this many paths between queries")
+    parser.add_argument("--best-match", action="store_true",
+                        help="in batch and server modes, resolve ambiguous "
+                             "names to the person with the most movies")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="print peak memory before and after loading")
+    args = parser.parse_args()
+    if args.costars and not args.compact:
+        parser.error("--costars requires --compact")
+    directory = args.directory
+
+    # Load data from files into memory, keeping stdout clean for batches
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    before = peak_memory()
+    if args.landmarks is None:
+        args.landmarks = 8 if args.astar else 0
+    load_data(directory, compact=args.compact, cache=args.cache,
+              landmark_count=args.landmarks, costars=args.costars)
+    print("Data loaded.", file=log)
+    if args.memory_report and before is not None:
+        print(f"Peak memory: {before / 2 ** 20:.1f} MiB before loading, "
+              f"{peak_memory() / 2 ** 20:.1f} MiB after.", file=log)
+    if args.cache_size:
+        enable_path_cache(args.cache_size)
+    global resolve_best_match
+    resolve_best_match = args.best_match
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.bidirectional,
+                      args.workers or None, args.astar)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.bidirectional,
+                          args.workers or None, args.astar)
+        return
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        serve_http(host or "localhost", int(port), args.bidirectional,
+                   args.astar)
+        return
+    if args.socket:
+        serve_unix(args.socket, args.bidirectional, args.astar)
+        return
+    if args.histogram:
+        show_histogram(args.histogram, args.to)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,8 +219,15 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=args.bidirectional,
+                         astar=args.astar)
+    print_path(source, path)
 
+
+def print_path(source, path):
+    """
+    Prints a path of (movie_id, person_id) pairs starting at `source`.
+    """
     if path is None:
         print("Not connected.")
     else:
@@ -78,23 +235,65 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None,
+                  astar=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, searches from both ends at once.
+    If `astar` is True, searches with A* guided by the landmarks.
+    If `stats` is a dict, the number of expanded people is stored
+    under "expanded".
+
     If no possible path, returns None.
     """
+    if path_cache is None:
+        return find_path(source, target, bidirectional, stats, astar)
+    path = path_cache.get(source, target)
+    if path is MISS:
+        path = find_path(source, target, bidirectional, stats, astar)
+        path_cache.put(source, target, path)
+    return path
+
+
+def enable_path_cache(capacity=10000):
+    """
+    Puts a PathCache of `capacity` paths in front of shortest_path,
+    or removes it if `capacity` is None. Returns the cache.
+    """
+    global path_cache
+    path_cache = None if capacity is None else PathCache(capacity)
+    return path_cache
+
+
+def find_path(source, target, bidirectional=False, stats=None,
+              astar=False):
+    """
+    Searches for the shortest path like shortest_path, bypassing
+    the path cache.
+    """
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional, stats,
+                                   astar)
+    if astar:
+        return astar_search(source, target, stats)
+    if bidirectional:
+        return bidirectional_search(source, target, stats)
+
+    # A person is zero steps from themselves, as in every other search
+    if source == target:
+        return []
 
     # Initialize start node, add it to frontier
     start = Node(source, None, None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     # Initialize empty explored set
@@ -108,6 +307,8 @@ def shortest_path(source, target):
 
         # Pick a new node to remove and inspect
         node = frontier.remove()
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + 1
 
         # Add to explored set
         explored.add(node.state)
@@ -151,20 +352,181 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def build_landmarks(count):
+    """
+    Chooses `count` landmarks among the people with the most movies,
+    skipping co-stars of landmarks already chosen so they spread out,
+    and stores their distances to every person for A* search.
+    """
+    global landmarks
+    if graph is not None:
+        graph.build_landmarks(count)
+        return
+    chosen = []
+    near = set()
+    for person_id in sorted(people, key=movie_count, reverse=True):
+        if len(chosen) == count:
+            break
+        if person_id in near:
+            continue
+        distance, _ = distances_from(person_id)
+        chosen.append(distance)
+        near.update(person for _, person in neighbors_for_person(person_id))
+    landmarks = chosen
+
+
+def astar_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* with the
+    landmark (ALT) heuristic, as `Graph.astar_search`.
+
+    If no possible path, returns None.
+    """
+    heuristic = landmark_heuristic(
+        lambda person: [distance.get(person, -1) for distance in landmarks],
+        target)
+    return search_astar(source, target, neighbors_for_person, heuristic,
+                        stats)
+
+
+def bidirectional_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one frontier
+    from each end until they meet.
+
+    If no possible path, returns None.
+    """
+    return search_bidirectional(source, target, neighbors_for_person, stats)
+
+
+def distances_from(source):
+    """
+    Runs a single breadth-first search from `source` over every person.
+
+    Returns (distance, predecessor) dicts for every reachable person:
+    distance maps a person_id to its degrees of separation from the source,
+    and predecessor maps it to the (movie_id, person_id) pair it was
+    reached through, or None for the source itself.
+    """
+    if graph is not None:
+        return graph.distances_from(source)
+
+    distance = {source: 0}
+    predecessor = {source: None}
+    frontier = deque([source])
+    while frontier:
+        person = frontier.popleft()
+        for movie, neighbor in neighbors_for_person(person):
+            if neighbor not in distance:
+                distance[neighbor] = distance[person] + 1
+                predecessor[neighbor] = (movie, person)
+                frontier.append(neighbor)
+    return distance, predecessor
+
+
+def path_from_predecessors(predecessor, target):
+    """
+    Returns the list of (movie_id, person_id) pairs from the source of
+    a `distances_from` predecessor table to `target`, or None if the
+    target was not reached.
+    """
+    if target not in predecessor:
+        return None
+    path = []
+    while predecessor[target] is not None:
+        movie, person = predecessor[target]
+        path.append((movie, target))
+        target = person
+    path.reverse()
+    return path
+
+
+def degree_histogram(distance):
+    """
+    Returns a sorted list of (degrees, count) pairs counting how many
+    people are each number of degrees away, from a `distances_from` table.
+    """
+    return sorted(Counter(distance.values()).items())
+
+
+def show_histogram(name, targets):
+    """
+    Prints the degrees of separation histogram from the person called
+    `name`, then the path to each person named in `targets`.
+    """
+    source = person_id_for_name(name)
+    if source is None:
+        sys.exit("Person not found.")
+    distance, predecessor = distances_from(source)
+
+    total = len(people) if graph is None else len(graph.person_ids)
+    for degrees, count in degree_histogram(distance):
+        print(f"{degrees}: {count}")
+    print(f"Not connected: {total - len(distance)}")
+
+    for target_name in targets:
+        target = person_id_for_name(target_name)
+        if target is None:
+            print(f"Person not found: {target_name}")
+            continue
+        print_path(source, path_from_predecessors(predecessor, target))
+
+
+def shortest_paths(pairs, workers=None, bidirectional=False, astar=False):
+    """
+    Returns the shortest path for every (source, target) pair of
+    person ids, in input order, spread over `workers` processes
+    (None for one per core).
+    """
+    pairs = list(pairs)
+    if workers == 1 or len(pairs) <= 1:
+        return [shortest_path(source, target, bidirectional, astar=astar)
+                for source, target in pairs]
+    workers = workers or os.cpu_count()
+    search = partial(shortest_path, bidirectional=bidirectional,
+                     astar=astar)
+    chunksize = max(1, len(pairs) // (4 * workers))
+    with worker_pool(workers) as pool:
+        return pool.starmap(search, pairs, chunksize)
+
+
+def worker_pool(workers=None):
+    """
+    Returns a process pool whose workers share the loaded data.
+
+    Where possible, workers are forked so they inherit the data
+    copy-on-write instead of receiving it pickled; otherwise each
+    spawned worker reloads it, which is fast from the snapshot.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+
+        # Keep the garbage collector from touching, and so copying,
+        # every inherited object in every worker; the parent collects
+        # them again once the workers are forked
+        gc.freeze()
+        try:
+            return multiprocessing.get_context("fork").Pool(workers)
+        finally:
+            gc.unfreeze()
+    return multiprocessing.get_context("spawn").Pool(
+        workers, initializer=load_data, initargs=loaded)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -177,11 +539,31 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns a list of the IMDB ids of every person called `name`.
+    """
+    if graph is not None:
+        return list(graph.people_named(name))
+    return list(names.get(name.lower(), set()))
+
+
+def is_person_id(person_id):
+    """
+    Returns True if `person_id` is the id of a loaded person.
+    """
+    if graph is not None:
+        return person_id in graph.person_index
+    return person_id in people
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -190,5 +572,270 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_name(person_id):
+    """
+    Returns the name of a person.
+    """
+    if graph is not None:
+        return graph.person_names[graph.person_index[person_id]]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    """
+    Returns the birth year of a person.
+    """
+    if graph is not None:
+        return graph.person_field(graph.person_index[person_id], "birth")
+    return people[person_id]["birth"]
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        return graph.movie_count(person_id)
+    return len(people[person_id]["movies"])
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie.
+    """
+    if graph is not None:
+        return graph.movie_field(graph.movie_index[movie_id], "title")
+    return movies[movie_id]["title"]
+
+
+def get_name_index():
+    """
+    Returns the NameIndex over the loaded names, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            keys = graph.name_keys
+            people_for_key = graph.people_for_key
+        else:
+            keys = sorted(names)
+            people_for_key = lambda k: names[keys[k]]
+
+        # Rank names by the most movies anyone with that name starred in
+        name_index = NameIndex(keys, people_for_key, lambda k: max(
+            movie_count(person_id) for person_id in people_for_key(k)))
+    return name_index
+
+
+def candidates_for_name(name, limit=10, max_distance=2):
+    """
+    Returns up to `limit` people whose name matches `name` exactly,
+    by prefix, or within `max_distance` typos, best first, as dicts of
+    person_id, name, birth, movies, match and distance. Never prompts.
+
+    People are ranked by kind of match, then by distance for fuzzy
+    matches, then by how many movies they starred in.
+    """
+    kinds = {EXACT: "exact", PREFIX: "prefix", FUZZY: "fuzzy"}
+    index = get_name_index()
+    candidates = []
+    for kind, distance, k in index.search(name, limit, max_distance):
+        for person_id in index.people_for_key(k):
+            candidates.append({
+                "person_id": person_id,
+                "name": person_name(person_id),
+                "birth": person_birth(person_id),
+                "movies": movie_count(person_id),
+                "match": kinds[kind],
+                "distance": distance,
+                "rank": (kind, distance if kind == FUZZY else 0),
+            })
+    candidates.sort(key=lambda c: (c["rank"], -c["movies"]))
+    for candidate in candidates:
+        del candidate["rank"]
+    return candidates[:limit]
+
+
+def resolve_person(text, best_match=None):
+    """
+    Returns the person id for `text`, which may be an id or a name,
+    without ever prompting. Raises LookupError if there is no single match.
+
+    If `best_match` is True (by default, `resolve_best_match`), an
+    ambiguous name resolves to the person with the most movies.
+    """
+    if best_match is None:
+        best_match = resolve_best_match
+    text = text.strip()
+    if is_person_id(text):
+        return text
+    person_ids = person_ids_for_name(text)
+    if len(person_ids) == 0:
+        suggestions = [c["name"] for c in candidates_for_name(text, 3)]
+        hint = f" (did you mean {', '.join(suggestions)}?)" if (
+            suggestions) else ""
+        raise LookupError(f"Person not found: {text}{hint}")
+    if len(person_ids) > 1:
+        if best_match:
+            return max(sorted(person_ids), key=movie_count)
+        raise LookupError(
+            f"Ambiguous name: {text} ({', '.join(sorted(person_ids))})")
+    return person_ids[0]
+
+
+def answer_query(source_text, target_text, bidirectional=False,
+                 astar=False):
+    """
+    Answers one query between two people given by id or name.
+    Returns a JSON-serializable dict with the path or an error.
+    """
+    answer = {"source": source_text, "target": target_text}
+    try:
+        source = resolve_person(source_text)
+        target = resolve_person(target_text)
+    except LookupError as error:
+        answer["error"] = str(error)
+        return answer
+    path = shortest_path(source, target, bidirectional=bidirectional,
+                         astar=astar)
+    answer["degrees"] = None if path is None else len(path)
+    answer["path"] = None if path is None else [list(step) for step in path]
+    return answer
+
+
+def parse_pair(line):
+    """
+    Splits a query line into two people, separated by a tab,
+    or by the first comma if the line has no tab.
+    """
+    separator = "\t" if "\t" in line else ","
+    source, found, target = line.rstrip("\r\n").partition(separator)
+    if not found:
+        raise ValueError(f"Expected two people: {line.strip()}")
+    return source, target
+
+
+def answer_line(line, bidirectional=False, astar=False):
+    """
+    Answers the query on one batch line.
+    Returns a JSON-serializable dict with the path or an error.
+    """
+    try:
+        return answer_query(*parse_pair(line), bidirectional, astar)
+    except ValueError as error:
+        return {"error": str(error)}
+
+
+def run_batch(lines, output, bidirectional=False, workers=1, astar=False):
+    """
+    Answers a query for every non-empty line of `lines`, writing one
+    JSON object per line to `output`, and reports throughput on stderr.
+
+    With more than one worker (None for one per core), queries are
+    answered by a process pool, still in input order.
+    """
+    count = 0
+    start = time.perf_counter()
+    lines = (line for line in lines if line.strip())
+    answer = partial(answer_line, bidirectional=bidirectional, astar=astar)
+    if workers == 1:
+        answers = map(answer, lines)
+    else:
+        pool = worker_pool(workers)
+        answers = pool.imap(answer, lines, chunksize=64)
+    for result in answers:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        count += 1
+    if workers != 1:
+        pool.close()
+        pool.join()
+    seconds = time.perf_counter() - start
+    rate = count / seconds if seconds else 0
+    print(f"Answered {count} queries in {seconds:.3f}s "
+          f"({rate:.1f} queries/s).", file=sys.stderr)
+    if path_cache is not None and workers == 1:
+        print(f"Path cache: {json.dumps(path_cache.stats())}",
+              file=sys.stderr)
+
+
+def serve_http(host, port, bidirectional=False, astar=False):
+    """
+    Answers GET /path?source=...&target=... with JSON until interrupted,
+    handling each request on its own thread. GET /names?q=...&limit=...
+    returns ranked name candidates and GET /stats the path cache counters.
+    """
+
+    # Build name lookup indexes up front so no request waits for them
+    get_name_index().prepare()
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/stats":
+                answer = {} if path_cache is None else path_cache.stats()
+            elif url.path == "/names" and "q" in query:
+                try:
+                    limit = int(query.get("limit", ["10"])[0])
+                except ValueError:
+                    limit = 0
+                if limit < 1:
+                    answer = {"error": "limit must be a positive integer"}
+                else:
+                    answer = candidates_for_name(query["q"][0], limit)
+            elif url.path == "/path" and {"source", "target"} <= set(query):
+                answer = answer_query(query["source"][0],
+                                      query["target"][0], bidirectional,
+                                      astar)
+            else:
+                self.send_error(404, "Use /path?source=...&target=...")
+                return
+            body = json.dumps(answer).encode("utf-8")
+            self.send_response(
+                400 if isinstance(answer, dict) and "error" in answer
+                else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    with ThreadingHTTPServer((host, port), Handler) as server:
+        print(f"Serving on http://{host}:{port}/path")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def serve_unix(path, bidirectional=False, astar=False):
+    """
+    Answers batch-format query lines over a Unix socket at `path`
+    until interrupted, handling each connection on its own thread.
+    """
+
+    get_name_index().prepare()
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            for line in self.rfile:
+                line = line.decode("utf-8")
+                if not line.strip():
+                    continue
+                answer = answer_line(line, bidirectional, astar)
+                self.wfile.write((json.dumps(answer) + "\n").encode("utf-8"))
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Serving on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,680 @@
+"""
+Compact, integer-indexed store for the degrees star graph.
+
+People and movies are numbered densely from 0 in file order. The bipartite
+star graph is kept in CSR form: the movies of person `p` are
+`person_movies[person_offsets[p]:person_offsets[p + 1]]` and the stars of
+movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+Names are indexed the same way: `name_keys` is the sorted list of distinct
+lowercase names and the people called `name_keys[k]` are
+`name_people[name_offsets[k]:name_offsets[k + 1]]`.
+
+An optional co-star adjacency lists each person's distinct co-stars once,
+with one movie they share: the co-stars of `p` are
+`costar_people[costar_offsets[p]:costar_offsets[p + 1]]`, in the same
+positions as their movies in `costar_movies`.
+
+Optional landmarks speed up A* search: the distance of person `p` from
+landmark `i` is `landmark_distances[i * len(person_ids) + p]`, or -1 if
+`p` cannot be reached from it.
+"""
+
+import csv
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import cached_property
+
+# Array typecode used for every offset and index array
+INDEX = "i"
+
+# Array typecode used for byte offsets into the CSV files
+ROW = "q"
+
+# Array typecode used for landmark distances
+DISTANCE = "h"
+
+
+class Graph():
+
+    def __init__(self, directory, person_ids, person_names, person_rows,
+                 movie_ids, movie_rows,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_keys=None, name_offsets=None, name_people=None,
+                 landmarks=None, landmark_distances=None,
+                 costar_offsets=None, costar_people=None, costar_movies=None):
+        self.directory = directory
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Byte offsets of each person's and movie's CSV row, from which
+        # display strings are read only when they are printed
+        self.person_rows = person_rows
+        self.movie_rows = movie_rows
+
+        # Build the name index unless it was loaded along with the graph
+        if name_keys is None:
+            name_keys, name_offsets, name_people = build_name_index(
+                person_names)
+        self.name_keys = name_keys
+        self.name_offsets = name_offsets
+        self.name_people = name_people
+
+        # Landmark person indices and their flattened distance arrays
+        self.landmarks = landmarks if landmarks is not None else array(INDEX)
+        self.landmark_distances = (landmark_distances
+                                   if landmark_distances is not None
+                                   else array(DISTANCE))
+
+        # Deduplicated co-star adjacency, empty until built
+        self.costar_offsets = (costar_offsets if costar_offsets is not None
+                               else array(INDEX))
+        self.costar_people = (costar_people if costar_people is not None
+                              else array(INDEX))
+        self.costar_movies = (costar_movies if costar_movies is not None
+                              else array(INDEX))
+
+    @cached_property
+    def person_index(self):
+        """Maps person ids back to their dense indices."""
+        return {person_id: i for i, person_id in enumerate(self.person_ids)}
+
+    @cached_property
+    def movie_index(self):
+        """Maps movie ids back to their dense indices."""
+        return {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph from the people, movies and stars CSV files
+        in `directory`, streaming them one row at a time and keeping
+        only ids and names in memory.
+        """
+        person_ids, person_names, person_rows = [], [], array(ROW)
+        movie_ids, movie_rows = [], array(ROW)
+        person_index, movie_index = {}, {}
+
+        # Load people
+        rows = read_rows(f"{directory}/people.csv")
+        columns = header_columns(next(rows)[1], "id", "name")
+        for offset, row in rows:
+            person_id, name = (row[column] for column in columns)
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            person_names.append(name)
+            person_rows.append(offset)
+
+        # Load movies
+        rows = read_rows(f"{directory}/movies.csv")
+        column, = header_columns(next(rows)[1], "id")
+        for offset, row in rows:
+            movie_index[row[column]] = len(movie_ids)
+            movie_ids.append(row[column])
+            movie_rows.append(offset)
+
+        # Load stars as two parallel edge arrays, skipping unknown ids
+        edge_people = array(INDEX)
+        edge_movies = array(INDEX)
+        rows = read_rows(f"{directory}/stars.csv")
+        columns = header_columns(next(rows)[1], "person_id", "movie_id")
+        for _, row in rows:
+            person_id, movie_id = (row[column] for column in columns)
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(
+            len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_stars = build_csr(
+            len(movie_ids), edge_movies, edge_people)
+
+        return cls(directory, person_ids, person_names, person_rows,
+                   movie_ids, movie_rows,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def person_field(self, person, field):
+        """
+        Reads `field` of person index `person` from people.csv.
+        """
+        return read_field(f"{self.directory}/people.csv",
+                          self.person_rows[person], field)
+
+    def movie_field(self, movie, field):
+        """
+        Reads `field` of movie index `movie` from movies.csv.
+        """
+        return read_field(f"{self.directory}/movies.csv",
+                          self.movie_rows[movie], field)
+
+    def people_named(self, name):
+        """
+        Returns the set of person ids whose name matches `name`,
+        ignoring case.
+        """
+        key = name.lower()
+        k = bisect_left(self.name_keys, key)
+        if k == len(self.name_keys) or self.name_keys[k] != key:
+            return set()
+        return set(self.people_for_key(k))
+
+    def people_for_key(self, k):
+        """
+        Returns the list of person ids called `name_keys[k]`.
+        """
+        return [self.person_ids[self.name_people[j]]
+                for j in range(self.name_offsets[k], self.name_offsets[k + 1])]
+
+    def movie_count(self, person_id):
+        """
+        Returns the number of movies a person starred in.
+        """
+        person = self.person_index[person_id]
+        return self.person_offsets[person + 1] - self.person_offsets[person]
+
+    def build_costars(self):
+        """
+        Precomputes each person's distinct co-stars, keeping the first
+        movie found for each as the witness of their edge.
+        """
+        offsets = array(INDEX, [0])
+        costars = array(INDEX)
+        witnesses = array(INDEX)
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for person in range(len(self.person_ids)):
+            seen = {person}
+            for k in range(self.person_offsets[person],
+                           self.person_offsets[person + 1]):
+                movie = person_movies[k]
+                for j in range(movie_offsets[movie],
+                               movie_offsets[movie + 1]):
+                    costar = movie_stars[j]
+                    if costar not in seen:
+                        seen.add(costar)
+                        costars.append(costar)
+                        witnesses.append(movie)
+            offsets.append(len(costars))
+        self.costar_offsets = offsets
+        self.costar_people = costars
+        self.costar_movies = witnesses
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with person index `person`.
+
+        Once co-stars are built, every co-star is yielded exactly once
+        and the person themself is left out.
+        """
+        if len(self.costar_offsets):
+            costar_people = self.costar_people
+            costar_movies = self.costar_movies
+            for k in range(self.costar_offsets[person],
+                           self.costar_offsets[person + 1]):
+                yield costar_movies[k], costar_people[k]
+            return
+
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for k in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source_id, target_id, bidirectional=False,
+                      stats=None, astar=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        if astar:
+            path = self.astar_search(source, target, stats)
+        elif bidirectional:
+            path = self.bidirectional_search(source, target, stats)
+        else:
+            path = self.breadth_first_search(source, target, stats)
+        return self.path_ids(path)
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) indices to string ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def breadth_first_search(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        from `source` to `target`, or None if they are not connected.
+        """
+        if source == target:
+            return []
+
+        # parent_person[p] is -1 until p is reached
+        parent_person = array(INDEX, [-1]) * len(self.person_ids)
+        parent_movie = array(INDEX, [-1]) * len(self.person_ids)
+        parent_person[source] = source
+        frontier = deque([source])
+
+        while frontier:
+            person = frontier.popleft()
+            if stats is not None:
+                stats["expanded"] = stats.get("expanded", 0) + 1
+            for movie, neighbor in self.neighbors(person):
+                if parent_person[neighbor] != -1:
+                    continue
+                parent_person[neighbor] = person
+                parent_movie[neighbor] = movie
+                if neighbor == target:
+                    return self._walk_back(parent_person, parent_movie,
+                                           source, target)
+                frontier.append(neighbor)
+        return None
+
+    def single_source(self, source):
+        """
+        Runs one breadth-first search from person index `source` over the
+        whole graph. Returns (distance, parent_person, parent_movie) arrays,
+        where distance is -1 for people who cannot be reached.
+        """
+        distance = array(INDEX, [-1]) * len(self.person_ids)
+        parent_person = array(INDEX, [-1]) * len(self.person_ids)
+        parent_movie = array(INDEX, [-1]) * len(self.person_ids)
+        distance[source] = 0
+        parent_person[source] = source
+        frontier = deque([source])
+
+        while frontier:
+            person = frontier.popleft()
+            for movie, neighbor in self.neighbors(person):
+                if distance[neighbor] != -1:
+                    continue
+                distance[neighbor] = distance[person] + 1
+                parent_person[neighbor] = person
+                parent_movie[neighbor] = movie
+                frontier.append(neighbor)
+        return distance, parent_person, parent_movie
+
+    def distances_from(self, source_id):
+        """
+        Returns (distance, predecessor) dicts keyed by person id for every
+        person reachable from `source_id`, as `degrees.distances_from`.
+        """
+        source = self.person_index[source_id]
+        distance, parent_person, parent_movie = self.single_source(source)
+        distances = {}
+        predecessors = {}
+        for person, steps in enumerate(distance):
+            if steps == -1:
+                continue
+            person_id = self.person_ids[person]
+            distances[person_id] = steps
+            if person == source:
+                predecessors[person_id] = None
+            else:
+                predecessors[person_id] = (
+                    self.movie_ids[parent_movie[person]],
+                    self.person_ids[parent_person[person]])
+        return distances, predecessors
+
+    def build_landmarks(self, count):
+        """
+        Chooses `count` landmarks among the people with the most movies,
+        skipping co-stars of landmarks already chosen so they spread out,
+        and stores their distances to every person.
+        """
+        size = len(self.person_ids)
+        by_movies = sorted(
+            range(size), reverse=True,
+            key=lambda p: self.person_offsets[p + 1] - self.person_offsets[p])
+
+        landmarks = array(INDEX)
+        distances = array(DISTANCE)
+        near = set()
+        for person in by_movies:
+            if len(landmarks) == count:
+                break
+            if person in near:
+                continue
+            distance, _, _ = self.single_source(person)
+            landmarks.append(person)
+            distances.extend(min(d, 2 ** 15 - 1) for d in distance)
+            near.update(neighbor for _, neighbor in self.neighbors(person))
+        self.landmarks = landmarks
+        self.landmark_distances = distances
+
+    def astar_search(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs from
+        `source` to `target`, or None if they are not connected, using A*
+        with the landmark (ALT) heuristic.
+        """
+        size = len(self.person_ids)
+        distances = self.landmark_distances
+        bases = [i * size for i in range(len(self.landmarks))]
+        heuristic = landmark_heuristic(
+            lambda person: [distances[base + person] for base in bases],
+            target)
+        return search_astar(source, target, self.neighbors, heuristic, stats)
+
+    def _walk_back(self, parent_person, parent_movie, source, target):
+        """
+        Follows parent arrays from `target` back to `source`.
+        """
+        path = []
+        person = target
+        while person != source:
+            path.append((parent_movie[person], person))
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+    def bidirectional_search(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        from `source` to `target`, growing one frontier from each end,
+        or None if they are not connected.
+        """
+        return search_bidirectional(source, target, self.neighbors, stats)
+
+
+def read_rows(path):
+    """
+    Yields (byte offset, fields) for every row of the CSV file at `path`,
+    reading it one line at a time.
+    """
+    with open(path, "rb") as f:
+        position = 0
+
+        def lines():
+            nonlocal position
+            for line in f:
+                position += len(line)
+                yield line.decode("utf-8")
+
+        # The reader only pulls the lines of one row at a time, so the
+        # position before each row is where that row starts
+        reader = csv.reader(lines())
+        while True:
+            start = position
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            yield start, row
+
+
+def header_columns(header, *names):
+    """
+    Returns the positions of the columns `names` in a CSV `header` row.
+    """
+    return [header.index(name) for name in names]
+
+
+def read_field(path, offset, field):
+    """
+    Returns column `field` of the CSV row starting at byte `offset`
+    of the file at `path`.
+    """
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(offset)
+        rows = csv.reader(line.decode("utf-8") for line in f)
+        return next(rows)[header.index(field)]
+
+
+def build_csr(size, sources, targets):
+    """
+    Groups the edges `sources[i]` -> `targets[i]` by source, dropping
+    repeated edges as the dict store's sets do. Returns (offsets, indices)
+    arrays where the distinct targets of `s` are
+    `indices[offsets[s]:offsets[s + 1]]`.
+    """
+
+    # Count edges per source, then turn counts into running offsets
+    offsets = array(INDEX, [0]) * (size + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    # Place every target into the next free slot of its source
+    indices = array(INDEX, [0]) * len(targets)
+    position = array(INDEX, offsets[:-1])
+    for source, target in zip(sources, targets):
+        indices[position[source]] = target
+        position[source] += 1
+
+    # Compact each row in place, keeping the first copy of every target
+    write = 0
+    for source in range(size):
+        start, end = offsets[source], offsets[source + 1]
+        offsets[source] = write
+        seen = set()
+        for k in range(start, end):
+            target = indices[k]
+            if target not in seen:
+                seen.add(target)
+                indices[write] = target
+                write += 1
+    offsets[size] = write
+    del indices[write:]
+    return offsets, indices
+
+
+def build_name_index(person_names):
+    """
+    Groups person indices by lowercase name.
+    Returns (keys, offsets, people) where `keys` is sorted and the people
+    called `keys[k]` are `people[offsets[k]:offsets[k + 1]]`.
+    """
+    order = sorted(range(len(person_names)),
+                   key=lambda person: person_names[person].lower())
+    keys = []
+    offsets = array(INDEX)
+    people = array(INDEX, order)
+    for position, person in enumerate(order):
+        key = person_names[person].lower()
+        if not keys or keys[-1] != key:
+            keys.append(key)
+            offsets.append(position)
+    offsets.append(len(order))
+    return keys, offsets, people
+
+
+def landmark_heuristic(distances, target):
+    """
+    Returns the landmark (ALT) heuristic towards `target`, where
+    `distances(person)` lists the distance from every landmark to a person,
+    or -1 where a landmark cannot reach them.
+
+    By the triangle inequality, no path from `p` to `target` is shorter
+    than |d(L, target) - d(L, p)| for any landmark L, so A* with it still
+    returns a shortest path. If a landmark reaches exactly one of `p` and
+    `target`, they are in different components and the heuristic returns
+    None.
+    """
+    to_target = distances(target)
+
+    def heuristic(person):
+        best = 0
+        for target_distance, distance in zip(to_target, distances(person)):
+            if (distance == -1) != (target_distance == -1):
+                return None
+            if abs(target_distance - distance) > best:
+                best = abs(target_distance - distance)
+        return best
+
+    return heuristic
+
+
+def search_astar(source, target, neighbors, heuristic, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs from `source` to
+    `target` found by A*, or None if they are not connected.
+
+    `neighbors(person)` yields (movie, person) pairs and `heuristic(person)`
+    never overestimates the steps left, or is None if `target` cannot be
+    reached from that person.
+    """
+    if source == target:
+        return []
+    start = heuristic(source)
+    if start is None:
+        return None
+
+    # Frontier entries are (estimate, -cost, order, person), so ties go to
+    # the person farthest along, then to the one pushed first
+    cost = {source: 0}
+    parents = {source: None}
+    frontier = [(start, 0, 0, source)]
+    explored = set()
+    pushed = 1
+
+    while frontier:
+        person = heapq.heappop(frontier)[3]
+        if person in explored:
+            continue
+        if person == target:
+            path = []
+            while parents[person] is not None:
+                movie, parent = parents[person]
+                path.append((movie, person))
+                person = parent
+            path.reverse()
+            return path
+        explored.add(person)
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + 1
+
+        steps = cost[person] + 1
+        for movie, neighbor in neighbors(person):
+            if neighbor in cost and cost[neighbor] <= steps:
+                continue
+            estimate = heuristic(neighbor)
+            if estimate is None:
+                continue
+            cost[neighbor] = steps
+            parents[neighbor] = (movie, person)
+            heapq.heappush(frontier,
+                           (steps + estimate, -steps, pushed, neighbor))
+            pushed += 1
+    return None
+
+
+def search_bidirectional(source, target, neighbors, stats=None):
+    """
+    Returns the shortest list of (movie, person) pairs from `source` to
+    `target`, growing one breadth-first frontier from each end until they
+    meet, or None if they are not connected. `neighbors(person)` yields
+    (movie, person) pairs.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a reached person to the (movie, person) it came from,
+    # and to its distance from that side
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Always expand the smaller frontier by one full layer
+        forward = len(forward_frontier) <= len(backward_frontier)
+        if forward:
+            frontier, parents, depth = (
+                forward_frontier, forward_parents, forward_depth)
+            other_depth = backward_depth
+        else:
+            frontier, parents, depth = (
+                backward_frontier, backward_parents, backward_depth)
+            other_depth = forward_depth
+
+        # Finish the whole layer so the best meeting point is kept
+        best = None
+        layer = []
+        for person in frontier:
+            if stats is not None:
+                stats["expanded"] = stats.get("expanded", 0) + 1
+            for movie, neighbor in neighbors(person):
+                if neighbor in other_depth:
+                    length = depth[person] + 1 + other_depth[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, person, movie, neighbor)
+                if neighbor not in parents:
+                    parents[neighbor] = (movie, person)
+                    depth[neighbor] = depth[person] + 1
+                    layer.append(neighbor)
+
+        if best is not None:
+            _, person, movie, neighbor = best
+            if not forward:
+                person, neighbor = neighbor, person
+            return join_paths(forward_parents, backward_parents,
+                              person, movie, neighbor)
+
+        if forward:
+            forward_frontier = layer
+        else:
+            backward_frontier = layer
+
+    return None
+
+
+def join_paths(forward_parents, backward_parents, left, movie, right):
+    """
+    Builds the source-to-target path through the edge `left` -> `right`,
+    where `left` was reached from the source and `right` from the target.
+    """
+
+    # Walk back from the meeting point to the source
+    path = []
+    person = left
+    while forward_parents[person] is not None:
+        parent_movie, parent = forward_parents[person]
+        path.append((parent_movie, person))
+        person = parent
+    path.reverse()
+
+    # Cross the meeting edge, then walk forward to the target
+    path.append((movie, right))
+    person = right
+    while backward_parents[person] is not None:
+        child_movie, child = backward_parents[person]
+        path.append((child_movie, child))
+        person = child
+    return path
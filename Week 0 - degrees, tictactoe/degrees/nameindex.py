@@ -0,0 +1,219 @@
+"""
+Name lookup with prefix and typo-tolerant search.
+
+Names are searched as a sorted list of distinct lowercase keys. Prefix
+search is a pair of binary searches, after which the matching keys are
+ranked by popularity. Fuzzy search uses a trigram index, built on first
+use: a name within edit distance `d` of the query still shares all but at
+most 3d of its trigrams. Counting the query's posting lists therefore
+leaves only the names that share enough of them, which are checked with an
+edit distance banded to `d`. A query with 3d or fewer distinct trigrams
+may share none with a close name; for such short queries only the 3d + 1
+rarest posting lists are scanned, and fuzzy search can miss matches.
+"""
+
+import heapq
+import itertools
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from graph import INDEX
+
+# Ranks of the kinds of match, best first
+EXACT = 0
+PREFIX = 1
+FUZZY = 2
+
+
+class NameIndex():
+
+    def __init__(self, keys, people_for_key, popularity=None):
+        """
+        `keys` is a sorted list of distinct lowercase names and
+        `people_for_key(k)` returns the person ids called `keys[k]`.
+        `popularity(k)`, if given, scores `keys[k]` for ranking prefix
+        matches, higher first.
+        """
+        self.keys = keys
+        self.people_for_key = people_for_key
+        self.popularity = popularity
+        self.postings = None
+        self.weights = None
+
+    def exact(self, name):
+        """
+        Returns the key index of `name`, ignoring case, or None.
+        """
+        key = name.lower()
+        k = bisect_left(self.keys, key)
+        if k < len(self.keys) and self.keys[k] == key:
+            return k
+        return None
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns key indices of names starting with `prefix`: all of them
+        in order, or the `limit` most popular ones, most popular first.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        if limit is None or end - start <= limit and self.popularity is None:
+            return range(start, end)
+        if self.popularity is None:
+            return range(start, start + limit)
+        weights = self._weights()
+        return heapq.nlargest(limit, range(start, end),
+                              key=weights.__getitem__)
+
+    def fuzzy(self, name, max_distance=2):
+        """
+        Returns (distance, key index) pairs for names within `max_distance`
+        edits of `name`, closest first, then most popular first.
+        """
+        query = name.lower()
+        postings = self._postings()
+        grams = sorted(set(trigrams(query)),
+                       key=lambda gram: len(postings.get(gram, ())))
+
+        # Each edit loses at most 3 of the query's trigrams, so a match
+        # shares at least this many of them: count how many each name
+        # shares and keep those with enough
+        shared = len(grams) - 3 * max_distance
+        if shared > 0:
+            counts = Counter(itertools.chain.from_iterable(
+                postings.get(gram, ()) for gram in grams))
+            candidates = [k for k, count in counts.items() if count >= shared]
+
+        # Otherwise only the rarest trigrams need scanning to find every
+        # candidate
+        else:
+            candidates = set()
+            for gram in grams[:3 * max_distance + 1]:
+                candidates.update(postings.get(gram, ()))
+
+        matches = []
+        for k in candidates:
+            key = self.keys[k]
+            if abs(len(key) - len(query)) > max_distance:
+                continue
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, k))
+        if self.popularity is None:
+            matches.sort()
+        else:
+            weights = self._weights()
+            matches.sort(key=lambda match: (match[0], -weights[match[1]],
+                                            match[1]))
+        return matches
+
+    def search(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` (kind, distance, key index) matches for
+        `name`: the exact match, then prefix matches, then fuzzy ones.
+        """
+        results = []
+        seen = set()
+
+        def add(kind, distance, k):
+            if k not in seen and len(results) < limit:
+                seen.add(k)
+                results.append((kind, distance, k))
+
+        k = self.exact(name)
+        if k is not None:
+            add(EXACT, 0, k)
+        for k in self.prefix(name, limit):
+            add(PREFIX, len(self.keys[k]) - len(name), k)
+        if len(results) < limit and max_distance:
+            for distance, k in self.fuzzy(name, max_distance):
+                add(FUZZY, distance, k)
+        return results
+
+    def prepare(self):
+        """
+        Builds the popularity scores and the trigram index now rather
+        than on the first search that needs them.
+        """
+        if self.popularity is not None:
+            self._weights()
+        self._postings()
+
+    def _weights(self):
+        """
+        Returns the popularity of every key, computing it on first use.
+        """
+        if self.weights is None:
+            self.weights = array(INDEX, (self.popularity(k)
+                                         for k in range(len(self.keys))))
+        return self.weights
+
+    def _postings(self):
+        """
+        Returns the trigram index, mapping each trigram to the array
+        of key indices containing it, building it on first use.
+        """
+        if self.postings is None:
+            postings = {}
+            for k, key in enumerate(self.keys):
+                for gram in set(trigrams(key)):
+                    if gram not in postings:
+                        postings[gram] = array(INDEX)
+                    postings[gram].append(k)
+            self.postings = postings
+        return self.postings
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of `text`, padded so that its start and end
+    count as well.
+    """
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between `a` and `b`,
+    or `limit + 1` as soon as it is known to exceed `limit`.
+
+    Uses Myers' bit-parallel algorithm: bit i of the vectors holds the
+    vertical differences of the dynamic programming column at row i, so
+    each character of `b` costs a handful of integer operations.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return len(b)
+
+    # Bit masks of the positions of every character of `a`
+    positions = {}
+    for i, c in enumerate(a):
+        positions[c] = positions.get(c, 0) | 1 << i
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+
+    up, down = full, 0
+    distance = len(a)
+    for j, c in enumerate(b, 1):
+        match = positions.get(c, 0)
+        vertical = match | down
+        horizontal = (((match & up) + up) ^ up) | match
+        right = down | (~(horizontal | up) & full)
+        left = up & horizontal
+        if right & last:
+            distance += 1
+        elif left & last:
+            distance -= 1
+
+        # The rest of `b` can lower the distance by at most one each
+        if distance - (len(b) - j) > limit:
+            return limit + 1
+        right = (right << 1 | 1) & full
+        left = (left << 1) & full
+        up = left | (~(vertical | right) & full)
+        down = right & vertical
+    return min(distance, limit + 1)
@@ -0,0 +1,164 @@
+"""
+Bounded LRU cache of shortest paths between people.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+# Returned by PathCache.get when nothing cached answers a query, since None
+# is a valid cached answer meaning "not connected"
+MISS = object()
+
+
+class PathCache():
+    """
+    Caches shortest paths keyed on the unordered pair of their endpoints.
+
+    A path cached for A -> B also answers B -> A by reversing it, and any
+    two people on a cached path are answered by the sub-path between them,
+    since every sub-path of a shortest path is itself a shortest path.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+
+        # Maps (low, high) person ids to (people, movies) tuples running
+        # from low to high, or to None if they are not connected
+        self.entries = OrderedDict()
+
+        # Maps each person to {key: position} of the cached paths through it
+        self.positions = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, source, target):
+        """
+        Returns the cached list of (movie_id, person_id) pairs from `source`
+        to `target`, None if they are cached as not connected, or MISS.
+        """
+        key = pair_key(source, target)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                entry = self.entries[key]
+                if entry is None:
+                    return None
+                people, movies = entry
+                return orient(people, movies, 0, len(people) - 1,
+                              source == key[1])
+
+            # Look for a cached path that passes through both people,
+            # scanning whichever of them lies on fewer paths
+            sources = self.positions.get(source, {})
+            targets = self.positions.get(target, {})
+            scan = sources if len(sources) <= len(targets) else targets
+            for path_key in scan:
+                start = sources.get(path_key)
+                end = targets.get(path_key)
+                if start is None or end is None:
+                    continue
+                self.entries.move_to_end(path_key)
+                self.subpath_hits += 1
+                people, movies = self.entries[path_key]
+                return orient(people, movies, min(start, end),
+                              max(start, end), start > end)
+
+            self.misses += 1
+            return MISS
+
+    def put(self, source, target, path):
+        """
+        Caches `path` from `source` to `target`, as returned by
+        `shortest_path`, evicting the least recently used paths if full.
+        """
+        key = pair_key(source, target)
+        if path is None:
+            entry = None
+        else:
+            people = [source] + [person for _, person in path]
+            movies = [movie for movie, _ in path]
+            if source != key[0]:
+                people.reverse()
+                movies.reverse()
+            entry = (tuple(people), tuple(movies))
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return
+            self.entries[key] = entry
+            if entry is not None:
+                for position, person in enumerate(entry[0]):
+                    self.positions.setdefault(person, {})[key] = position
+            while len(self.entries) > self.capacity:
+                self._evict()
+
+    def _evict(self):
+        key, entry = self.entries.popitem(last=False)
+        if entry is None:
+            return
+        for person in entry[0]:
+            paths = self.positions[person]
+            del paths[key]
+            if not paths:
+                del self.positions[person]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.positions.clear()
+
+    def stats(self):
+        """
+        Returns a dict of hit/miss counters and the cache size.
+        """
+        with self.lock:
+            lookups = self.hits + self.subpath_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "subpath_hits": self.subpath_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.hits + self.subpath_hits) / lookups
+                             if lookups else 0.0),
+                "bytes": self.memory_size(),
+            }
+
+    def memory_size(self):
+        """
+        Returns an estimate in bytes of the memory held by the cache's own
+        containers, not counting the id strings it shares with the graph.
+        """
+        size = sys.getsizeof(self.entries) + sys.getsizeof(self.positions)
+        for key, entry in self.entries.items():
+            size += sys.getsizeof(key)
+            if entry is not None:
+                size += sys.getsizeof(entry[0]) + sys.getsizeof(entry[1])
+        for paths in self.positions.values():
+            size += sys.getsizeof(paths)
+        return size
+
+
+def pair_key(source, target):
+    """
+    Returns the same key for a pair of people in either order.
+    """
+    return (source, target) if source <= target else (target, source)
+
+
+def orient(people, movies, start, end, reverse):
+    """
+    Returns the (movie_id, person_id) pairs from `people[start]` to
+    `people[end]`, or from `people[end]` to `people[start]` if `reverse`.
+    """
+    if not reverse:
+        return [(movies[i], people[i + 1]) for i in range(start, end)]
+    return [(movies[i - 1], people[i - 1]) for i in range(end, start, -1)]
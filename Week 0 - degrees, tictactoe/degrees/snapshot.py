@@ -0,0 +1,169 @@
+"""
+Binary snapshot of a compact degrees `Graph`, stored next to its CSV files.
+
+The file starts with a magic string and a JSON header, followed by raw
+sections aligned to 8 bytes. Index arrays are memory-mapped on load rather
+than copied; string lists are stored NUL-separated. The header records the
+size and modification time of every CSV file, so a snapshot is ignored as
+soon as any of them changes.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, DISTANCE, INDEX, ROW
+
+SNAPSHOT_FILE = "degrees.snapshot"
+SNAPSHOT_VERSION = 5
+
+MAGIC = b"DEGREES\0"
+HEADER_LENGTH = struct.Struct("<Q")
+ALIGNMENT = 8
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+ARRAYS = {
+    "person_offsets": INDEX,
+    "person_movies": INDEX,
+    "movie_offsets": INDEX,
+    "movie_stars": INDEX,
+    "name_offsets": INDEX,
+    "name_people": INDEX,
+    "person_rows": ROW,
+    "movie_rows": ROW,
+    "landmarks": INDEX,
+    "landmark_distances": DISTANCE,
+    "costar_offsets": INDEX,
+    "costar_people": INDEX,
+    "costar_movies": INDEX,
+}
+STRINGS = ["person_ids", "person_names", "movie_ids", "name_keys"]
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for `directory`.
+    """
+    return os.path.join(directory, SNAPSHOT_FILE)
+
+
+def source_stamps(directory):
+    """
+    Returns the [size, mtime_ns] of each CSV file in `directory`.
+    """
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def save_snapshot(directory, graph):
+    """
+    Writes `graph` to the snapshot file of `directory`.
+    Returns True on success, or False if the file could not be written.
+    """
+
+    # Encode every section and remember where it will start
+    sections = {}
+    chunks = []
+    position = 0
+    for name, typecode in ARRAYS.items():
+        data = array(typecode, getattr(graph, name)).tobytes()
+        sections[name] = [position, len(data)]
+        chunks.append(data)
+        position = _align(position + len(data))
+    for name in STRINGS:
+        values = getattr(graph, name)
+        data = "\0".join(values).encode("utf-8")
+        sections[name] = [position, len(data), len(values)]
+        chunks.append(data)
+        position = _align(position + len(data))
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "itemsizes": _itemsizes(),
+        "sources": source_stamps(directory),
+        "sections": sections,
+    }).encode("utf-8")
+
+    # Write to a temporary file first so readers never see a partial one
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            for chunk in chunks:
+                f.write(chunk)
+                f.write(b"\0" * (_align(len(chunk)) - len(chunk)))
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_snapshot(directory):
+    """
+    Returns the `Graph` stored in the snapshot file of `directory`,
+    or None if there is no snapshot or it is stale or unreadable.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            length, = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+            header = json.loads(f.read(length))
+            if (header["version"] != SNAPSHOT_VERSION
+                    or header["byteorder"] != sys.byteorder
+                    or header["itemsizes"] != _itemsizes()
+                    or header["sources"] != source_stamps(directory)):
+                return None
+            start = _align(len(MAGIC) + HEADER_LENGTH.size + length)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    # A truncated file would otherwise map shortened sections
+    if any(section[0] + section[1] > len(data) - start
+           for section in header["sections"].values()):
+        data.close()
+        return None
+
+    # Map index arrays in place and decode string lists
+    view = memoryview(data)
+    fields = {"directory": directory}
+    for name, typecode in ARRAYS.items():
+        offset, size = header["sections"][name]
+        fields[name] = view[start + offset:start + offset + size].cast(
+            typecode)
+    for name in STRINGS:
+        offset, size, count = header["sections"][name]
+        text = str(view[start + offset:start + offset + size], "utf-8")
+        fields[name] = text.split("\0") if count else []
+    return Graph(**fields)
+
+
+def _itemsizes():
+    """
+    Returns the item sizes of the array typecodes, which must match
+    between the writer and the reader of a snapshot.
+    """
+    return [array(typecode).itemsize for typecode in (INDEX, ROW, DISTANCE)]
+
+
+def _align(position):
+    """
+    Rounds `position` up to the next multiple of ALIGNMENT.
+    """
+    return -(-position // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,141 @@
+"""
+Opening book: the full solution of 3x3 Tic Tac Toe.
+
+Every reachable, unfinished position is stored once per symmetry class,
+under the base-3 code of its canonical image, with the optimal move in
+that orientation and the position's minimax value. Run this file to
+rebuild book.bin.
+
+book.bin holds a magic string, a version byte and the entry count, then
+the sorted codes as little-endian 32-bit integers and one byte per entry:
+the move cell in the low four bits and the value plus one in the high.
+"""
+
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+import tictactoe as ttt
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_VERSION = 1
+
+MAGIC = b"TTTBOOK"
+HEADER = struct.Struct("<BI")
+
+# Sorted codes and packed entries, loaded on first use
+codes = None
+entries = None
+
+
+def solve():
+    """
+    Returns a dict mapping the code of every reachable, unfinished
+    canonical position to (move cell, value).
+    """
+    table = {}
+    frontier = [ttt.board_key(ttt.initial_state())]
+    seen = set(frontier)
+    while frontier:
+        key = frontier.pop()
+        if ttt.key_terminal(key):
+            continue
+        currentPlayer = ttt.key_player(key)
+        best = None
+        for cell in ttt.MOVE_ORDER:
+            if key[cell] != ttt.EMPTY:
+                continue
+            child = key[:cell] + (currentPlayer,) + key[cell + 1:]
+            value = ttt.solved_value(child)
+            if (best is None or (currentPlayer == ttt.X and value > best[1])
+                    or (currentPlayer == ttt.O and value < best[1])):
+                best = (cell, value)
+            child, _ = ttt.canonical(child)
+            if child not in seen:
+                seen.add(child)
+                frontier.append(child)
+        table[ttt.key_code(key)] = best
+    return table
+
+
+def pack(table):
+    """
+    Returns the sorted codes and packed entries of a solved `table`.
+    """
+    book_codes = array("I", sorted(table))
+    book_entries = array("B", (table[code][0] | (table[code][1] + 1) << 4
+                               for code in book_codes))
+    return book_codes, book_entries
+
+
+def write_book(path=BOOK_FILE):
+    """
+    Solves the game and writes the book to `path`.
+    Returns the number of positions written.
+    """
+    book_codes, book_entries = pack(solve())
+    if sys.byteorder != "little":
+        book_codes.byteswap()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(BOOK_VERSION, len(book_codes)))
+        f.write(book_codes.tobytes())
+        f.write(book_entries.tobytes())
+    return len(book_codes)
+
+
+def load_book(path=BOOK_FILE):
+    """
+    Loads the book from `path`, solving the game in memory instead
+    if the file is missing or from another version.
+    """
+    global codes, entries
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("not a book file")
+            version, count = HEADER.unpack(f.read(HEADER.size))
+            if version != BOOK_VERSION:
+                raise ValueError("unsupported book version")
+            book_codes = array("I")
+            book_codes.frombytes(f.read(count * book_codes.itemsize))
+            book_entries = array("B", f.read(count))
+        if sys.byteorder != "little":
+            book_codes.byteswap()
+    except (OSError, ValueError, struct.error):
+        book_codes, book_entries = pack(solve())
+    codes, entries = book_codes, book_entries
+
+
+def lookup(key):
+    """
+    Returns (move cell, value) for a flattened, unfinished board,
+    in the board's own orientation.
+    """
+    if codes is None:
+        load_book()
+    image, symmetry = ttt.canonical(key)
+    k = bisect_left(codes, ttt.key_code(image))
+    if k == len(codes) or codes[k] != ttt.key_code(image):
+        raise ttt.ActionError("Position not reachable")
+    entry = entries[k]
+    return symmetry[entry & 15], (entry >> 4) - 1
+
+
+def book_move(board):
+    """
+    Returns the optimal action for the current player on the board,
+    or None if the game is over.
+    """
+    key = ttt.board_key(board)
+    if ttt.key_terminal(key):
+        return None
+    cell, _ = lookup(key)
+    return (cell // 3, cell % 3)
+
+
+if __name__ == "__main__":
+    print(f"Wrote {write_book()} positions to {BOOK_FILE}")
@@ -0,0 +1,300 @@
+"""
+Generalized m,n,k game: players take turns on a board of `rows` x `cols`
+cells and the first to get `k` in a row, column or diagonal wins.
+
+Full minimax is only feasible on 3x3, so larger boards are searched with
+depth-limited alpha-beta, an evaluation function and iterative deepening
+under a time budget. With `gravity`, marks drop to the lowest empty cell
+of their column, as in Connect Four (7x6, k=4).
+"""
+
+import math
+import random
+import time
+
+from tictactoe import X, O, EMPTY, ActionError
+
+# Score of a won position, well above any evaluation
+WIN = 10 ** 9
+
+
+class SearchTimeout(Exception):
+    # Raised when a search runs out of its time budget
+    pass
+
+
+class MNKGame():
+    """
+    Rules, evaluation and search for one m,n,k game variant
+    """
+
+    def __init__(self, rows=3, cols=3, k=3, gravity=False):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.gravity = gravity
+
+        # Every run of k consecutive cells along a row, column or diagonal
+        self.windows = []
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            for i in range(rows):
+                for j in range(cols):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.windows.append(tuple(
+                            (i + di * step, j + dj * step)
+                            for step in range(k)))
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        marks = sum(cell is not EMPTY for row in board for cell in row)
+        return X if marks % 2 == 0 else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        if self.gravity:
+            actions = set()
+            for j in range(self.cols):
+                for i in reversed(range(self.rows)):
+                    if board[i][j] == EMPTY:
+                        actions.add((i, j))
+                        break
+            return actions
+        return {(i, j) for i in range(self.rows) for j in range(self.cols)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        if action not in self.actions(board):
+            raise ActionError("Invalid Action")
+        resultBoard = [row[:] for row in board]
+        resultBoard[action[0]][action[1]] = self.player(board)
+        return resultBoard
+
+    def wins_at(self, board, i, j):
+        """
+        Returns True if the mark at (i, j) completes k in a row.
+        """
+        mark = board[i][j]
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            count = 1
+            for sign in (1, -1):
+                step_i, step_j = i + sign * di, j + sign * dj
+                while (0 <= step_i < self.rows and 0 <= step_j < self.cols
+                       and board[step_i][step_j] == mark):
+                    count += 1
+                    step_i += sign * di
+                    step_j += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for window in self.windows:
+            i, j = window[0]
+            mark = board[i][j]
+            if mark != EMPTY and all(board[a][b] == mark for a, b in window):
+                return mark
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        Winner = self.winner(board)
+        return 1 if Winner == X else -1 if Winner == O else 0
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic score of the board from X's point of view.
+
+        Every window of k cells that holds marks of only one player is
+        still winnable by them, and is worth more the fuller it is.
+        """
+        score = 0
+        for window in self.windows:
+            xs = os = 0
+            for i, j in window:
+                if board[i][j] == X:
+                    xs += 1
+                elif board[i][j] == O:
+                    os += 1
+            if xs and not os:
+                score += 4 ** xs
+            elif os and not xs:
+                score -= 4 ** os
+        return score
+
+    def candidates(self, board):
+        """
+        Returns the actions worth searching, nearest the center first.
+
+        On open boards, only cells next to an existing mark are considered.
+        """
+        actions = self.actions(board)
+        if not self.gravity and self.rows * self.cols > 16:
+            near = {action for action in actions
+                    if self._has_neighbor(board, *action)}
+            actions = near or actions
+        center_i, center_j = (self.rows - 1) / 2, (self.cols - 1) / 2
+        return sorted(actions, key=lambda action: (
+            abs(action[0] - center_i) + abs(action[1] - center_j), action))
+
+    def _has_neighbor(self, board, i, j):
+        """
+        Returns True if any cell around (i, j) holds a mark.
+        """
+        for a in range(max(0, i - 1), min(self.rows, i + 2)):
+            for b in range(max(0, j - 1), min(self.cols, j + 2)):
+                if board[a][b] != EMPTY:
+                    return True
+        return False
+
+    def best_move(self, board, time_budget=1.0, max_depth=None, stats=None):
+        """
+        Returns the best action for the current player found by iterative
+        deepening within `time_budget` seconds, or None if the game is over.
+
+        If `stats` is a dict, the deepest completed search is stored under
+        "depth" and the number of positions evaluated under "nodes".
+        """
+        if self.terminal(board):
+            return None
+        deadline = time.perf_counter() + time_budget
+        empty = sum(cell == EMPTY for row in board for cell in row)
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        sign = 1 if self.player(board) == X else -1
+        search = [row[:] for row in board]
+        if stats is None:
+            stats = {}
+
+        move = self.candidates(board)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                score, best = self._root(search, depth, sign, deadline,
+                                         move, stats)
+            except SearchTimeout:
+                break
+            move = best
+            stats["depth"] = depth
+
+            # A forced result will not change with more depth
+            if abs(score) >= WIN - depth:
+                break
+        return move
+
+    def _root(self, board, depth, sign, deadline, first, stats):
+        """
+        Searches every candidate to `depth`, the previous best first.
+        Returns (score, action) for the player to move.
+        """
+        actions = self.candidates(board)
+        actions.remove(first)
+        actions.insert(0, first)
+        alpha, beta = -math.inf, math.inf
+        best = first
+        for action in actions:
+            score = -self._negamax(board, action, depth - 1, -beta, -alpha,
+                                   -sign, deadline, stats)
+            if score > alpha:
+                alpha = score
+                best = action
+        return alpha, best
+
+    def _negamax(self, board, action, depth, alpha, beta, sign, deadline,
+                 stats):
+        """
+        Plays `action` for the player before `sign`, searches the reply to
+        `depth` and returns the score for the player `sign` to move.
+        """
+        stats["nodes"] = stats.get("nodes", 0) + 1
+        if stats["nodes"] % 128 == 0 and time.perf_counter() > deadline:
+            raise SearchTimeout
+
+        i, j = action
+        board[i][j] = X if sign == -1 else O
+        try:
+            # The player who just moved has won: a loss for `sign`, sooner
+            # losses scoring worse
+            if self.wins_at(board, i, j):
+                return -(WIN + depth)
+            actions = self.candidates(board)
+            if not actions:
+                return 0
+            if depth == 0:
+                return sign * self.evaluate(board)
+
+            value = -math.inf
+            for reply in actions:
+                value = max(value, -self._negamax(
+                    board, reply, depth - 1, -beta, -alpha, -sign,
+                    deadline, stats))
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+            return value
+        finally:
+            board[i][j] = EMPTY
+
+
+# Board variants benchmarked by this module
+VARIANTS = [
+    ("3x3 k=3", MNKGame(3, 3, 3)),
+    ("4x4 k=4", MNKGame(4, 4, 4)),
+    ("7x6 k=4 gravity", MNKGame(6, 7, 4, gravity=True)),
+    ("15x15 k=5", MNKGame(15, 15, 5)),
+]
+
+
+def benchmark(time_budget=1.0, openings=3, seed=0):
+    """
+    Returns (variant, mean seconds, max seconds, mean depth) per variant,
+    timing one move after `openings` random opening moves, five times.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for name, game in VARIANTS:
+        seconds = []
+        depths = []
+        for _ in range(5):
+            board = game.initial_state()
+            for _ in range(openings):
+                board = game.result(board, rng.choice(sorted(
+                    game.actions(board))))
+            stats = {}
+            start = time.perf_counter()
+            game.best_move(board, time_budget, stats=stats)
+            seconds.append(time.perf_counter() - start)
+            depths.append(stats.get("depth", 0))
+        rows.append((name, sum(seconds) / len(seconds), max(seconds),
+                     sum(depths) / len(depths)))
+    return rows
+
+
+if __name__ == "__main__":
+    for name, mean, worst, depth in benchmark():
+        print(f"{name:>16}: {mean:.3f}s mean, {worst:.3f}s max, "
+              f"depth {depth:.1f}")
@@ -1,7 +1,9 @@
 import pygame
 import sys
+import threading
 import time
 
+import mnk
 import tictactoe as ttt
 
 pygame.init()
@@ -17,9 +19,57 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Search engine used by the computer and, for the iterative deepening
+# "mnk" engine, its time budget in seconds, optionally on the command line
+engines = list(ttt.ENGINES) + ["mnk"]
+engine = sys.argv[1] if len(sys.argv) > 1 else "book"
+try:
+    time_budget = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+except ValueError:
+    time_budget = None
+if engine not in engines or time_budget is None or len(sys.argv) > 3:
+    sys.exit(f"Usage: python runner.py [{'|'.join(engines)}] [seconds]")
+game = mnk.MNKGame(3, 3, 3)
+
+# Least time the computer appears to think before it moves
+think_time = 0.5
+
+
+def compute_move(board):
+    """
+    Returns the computer's move on the board with the chosen engine.
+    """
+    if engine == "mnk":
+        return game.best_move(board, time_budget)
+    return ttt.minimax(board, engine)
+
+
+def start_move(board):
+    """
+    Starts searching the computer's move on the board in the background.
+    Returns the dict in which the search stores its "move", or "error".
+    """
+    search = {}
+
+    def run():
+        try:
+            search["move"] = compute_move(board)
+        except Exception as error:
+            search["error"] = error
+
+    # A daemon thread, so quitting never waits for a search to finish
+    threading.Thread(target=run, daemon=True).start()
+    return search
+
+
+# The computer's moves are searched in a background thread while the
+# window keeps redrawing; ai_move is the pending search, if any
+clock = pygame.time.Clock()
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_move = None
+ai_start = None
 
 while True:
 
@@ -108,15 +158,18 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, starting a search if none is running and
+        # playing its result once ready
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = start_move(board)
+                ai_start = time.perf_counter()
+            elif "error" in ai_move:
+                raise ai_move["error"]
+            elif ("move" in ai_move
+                    and time.perf_counter() - ai_start >= think_time):
+                board = ttt.result(board, ai_move["move"])
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +194,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
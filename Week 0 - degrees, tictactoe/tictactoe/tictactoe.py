@@ -4,11 +4,37 @@ Tic Tac Toe Player
 
 import math
 import copy
+import time
+from functools import lru_cache
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Order in which alpha-beta search tries cells: center, corners, edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# The 8 rotations and reflections of the board: symmetry[i] is the cell
+# of the original board that moves to cell i
+SYMMETRIES = sorted({
+    tuple(3 * i + j for i, j in cells)
+    for cells in [
+        [(i, j) for i in range(3) for j in range(3)],
+        [(2 - j, i) for i in range(3) for j in range(3)],
+        [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+        [(j, 2 - i) for i in range(3) for j in range(3)],
+        [(i, 2 - j) for i in range(3) for j in range(3)],
+        [(2 - i, j) for i in range(3) for j in range(3)],
+        [(j, i) for i in range(3) for j in range(3)],
+        [(2 - j, 2 - i) for i in range(3) for j in range(3)],
+    ]
+})
+
+# Cell indices of every row, column and diagonal of a flattened board
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6)]
+
 class ActionError(Exception):
     # Raised when action invalid
     pass
@@ -143,27 +169,280 @@ def utility(board):
         return 0
 
 
-def max_state(board):
+def max_state(board, stats=None):
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
     if terminal(board):
             return utility(board)
     v = -math.inf
     actionSet = actions(board)
     for action in actionSet:
-        v = max(v, min_state(result(board, action)))
+        v = max(v, min_state(result(board, action), stats))
     return v
 
-def min_state(board):
+def min_state(board, stats=None):
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
     if terminal(board):
             return utility(board)
     v = math.inf
     actionSet = actions(board)
     for action in actionSet:
-        v = min(v, max_state(result(board, action)))
+        v = min(v, max_state(result(board, action), stats))
     return v
 
-def minimax(board):
+def minimax(board, engine="book", stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    `engine` names one of ENGINES; if `stats` is a dict, the number of
+    positions the engine evaluated is added under "nodes".
+    """
+    return ENGINES[engine](board, stats)
+
+
+def memoized_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Every position is solved at most once per process: values are
+    memoized on the flattened board, so transpositions reached by
+    different move orders share one evaluation, across calls and games.
+    """
+    misses = solved_value.cache_info().misses
+    key = board_key(board)
+    if key_terminal(key):
+        return None
+
+    currentPlayer = key_player(key)
+    best_move = None
+    for cell in range(9):
+        if key[cell] != EMPTY:
+            continue
+        k = solved_value(key[:cell] + (currentPlayer,) + key[cell + 1:])
+        if (best_move is None or (currentPlayer == X and k > v)
+                or (currentPlayer == O and k < v)):
+            v = k
+            best_move = (cell // 3, cell % 3)
+    if stats is not None:
+        stats["nodes"] = (stats.get("nodes", 0)
+                          + solved_value.cache_info().misses - misses)
+    return best_move
+
+
+def board_key(board):
+    """
+    Returns the board flattened into a hashable tuple of nine cells.
+    """
+    return tuple(cell for row in board for cell in row)
+
+
+def key_code(key):
+    """
+    Returns a flattened board as a base-3 integer, with EMPTY as 0,
+    X as 1 and O as 2 in cell 0 as the least significant digit.
+    """
+    code = 0
+    for cell in reversed(key):
+        code = 3 * code + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return code
+
+
+def canonical(key):
+    """
+    Returns (canonical key, symmetry) for a flattened board, where the
+    canonical key is the one of its 8 symmetric images with the lowest
+    code, and is `key[cell]` at position i for `cell = symmetry[i]`.
+    """
+    return min(((tuple(key[cell] for cell in symmetry), symmetry)
+                for symmetry in SYMMETRIES),
+               key=lambda image: key_code(image[0]))
+
+
+def key_player(key):
+    """
+    Returns player who has the next turn on a flattened board.
+    """
+    return X if key.count(X) <= key.count(O) else O
+
+
+def key_winner(key):
+    """
+    Returns the winner on a flattened board, if there is one.
+    """
+    for a, b, c in LINES:
+        if key[a] != EMPTY and key[a] == key[b] == key[c]:
+            return key[a]
+    return None
+
+
+def key_terminal(key):
+    """
+    Returns True if the game on a flattened board is over.
+    """
+    return key_winner(key) is not None or EMPTY not in key
+
+
+@lru_cache(maxsize=None)
+def solved_value(key):
+    """
+    Returns the minimax value (1, 0 or -1 for X) of a flattened board.
+    """
+    Winner = key_winner(key)
+    if Winner == X:
+        return 1
+    elif Winner == O:
+        return -1
+    elif EMPTY not in key:
+        return 0
+
+    currentPlayer = key_player(key)
+    values = [solved_value(key[:cell] + (currentPlayer,) + key[cell + 1:])
+              for cell in range(9) if key[cell] == EMPTY]
+    return max(values) if currentPlayer == X else min(values)
+
+
+def symmetric_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Like memoized_minimax, but positions are first reduced to their
+    canonical image under rotation and reflection, so the 8 symmetric
+    variants of a position are solved once, and moves leading to
+    symmetric positions are only searched once. The chosen move is
+    mapped back to the orientation of the board.
+    """
+    misses = symmetric_value.cache_info().misses
+    key = board_key(board)
+    if key_terminal(key):
+        return None
+
+    image, symmetry = canonical(key)
+    currentPlayer = key_player(image)
+    best_cell = None
+    seen = set()
+    for cell in range(9):
+        if image[cell] != EMPTY:
+            continue
+        child, _ = canonical(image[:cell] + (currentPlayer,)
+                             + image[cell + 1:])
+        if child in seen:
+            continue
+        seen.add(child)
+        k = symmetric_value(child)
+        if (best_cell is None or (currentPlayer == X and k > v)
+                or (currentPlayer == O and k < v)):
+            v = k
+            best_cell = cell
+    if stats is not None:
+        stats["nodes"] = (stats.get("nodes", 0)
+                          + symmetric_value.cache_info().misses - misses)
+
+    # Cell i of the canonical image is cell symmetry[i] of the board
+    cell = symmetry[best_cell]
+    return (cell // 3, cell % 3)
+
+
+@lru_cache(maxsize=None)
+def symmetric_value(key):
+    """
+    Returns the minimax value (1, 0 or -1 for X) of a canonical
+    flattened board.
+    """
+    Winner = key_winner(key)
+    if Winner == X:
+        return 1
+    elif Winner == O:
+        return -1
+    elif EMPTY not in key:
+        return 0
+
+    currentPlayer = key_player(key)
+    children = {canonical(key[:cell] + (currentPlayer,) + key[cell + 1:])[0]
+                for cell in range(9) if key[cell] == EMPTY}
+    values = [symmetric_value(child) for child in children]
+    return max(values) if currentPlayer == X else min(values)
+
+
+def alphabeta_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    searching with alpha-beta pruning.
+
+    Moves are tried center first, then corners, then edges, and the
+    search stops as soon as a move reaches the best possible value.
+    """
+    key = board_key(board)
+    if key_terminal(key):
+        return None
+
+    currentPlayer = key_player(key)
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    for cell in MOVE_ORDER:
+        if key[cell] != EMPTY:
+            continue
+        child = key[:cell] + (currentPlayer,) + key[cell + 1:]
+        k = alphabeta_value(child, alpha, beta, stats)
+        if currentPlayer == X and k > alpha:
+            alpha = k
+            best_move = (cell // 3, cell % 3)
+        elif currentPlayer == O and k < beta:
+            beta = k
+            best_move = (cell // 3, cell % 3)
+        elif best_move is None:
+            best_move = (cell // 3, cell % 3)
+
+        # A forced win cannot be improved on
+        if (currentPlayer == X and alpha == 1) or (
+                currentPlayer == O and beta == -1):
+            break
+    return best_move
+
+
+def alphabeta_value(key, alpha, beta, stats=None):
+    """
+    Returns the minimax value of a flattened board, or a bound on it
+    outside the window (alpha, beta).
+    """
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+    Winner = key_winner(key)
+    if Winner == X:
+        return 1
+    elif Winner == O:
+        return -1
+    elif EMPTY not in key:
+        return 0
+
+    currentPlayer = key_player(key)
+    if currentPlayer == X:
+        v = -math.inf
+        for cell in MOVE_ORDER:
+            if key[cell] != EMPTY:
+                continue
+            child = key[:cell] + (X,) + key[cell + 1:]
+            v = max(v, alphabeta_value(child, alpha, beta, stats))
+            alpha = max(alpha, v)
+            if alpha >= beta or v == 1:
+                break
+    else:
+        v = math.inf
+        for cell in MOVE_ORDER:
+            if key[cell] != EMPTY:
+                continue
+            child = key[:cell] + (O,) + key[cell + 1:]
+            v = min(v, alphabeta_value(child, alpha, beta, stats))
+            beta = min(beta, v)
+            if alpha >= beta or v == -1:
+                break
+    return v
+
+
+def full_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the full game tree without memoization.
     """
 
     # Determine optimal value to fight for
@@ -176,15 +455,184 @@ def minimax(board):
     if currentPlayer == "X":
         v = -math.inf
         for action in actions(board):
-            k = min_state(result(board, action))
+            k = min_state(result(board, action), stats)
             if k > v:
                 v = k
                 best_move = action
     else:
         v = math.inf
         for action in actions(board):
-            k = max_state(result(board, action))
+            k = max_state(result(board, action), stats)
             if k < v:
                 v = k
                 best_move = action
     return best_move
+
+
+# Bitboard engine: a position is a pair of 9-bit integers (x, o) where
+# bit 3 * i + j is set if that player has a mark at (i, j), so the rules
+# need no list scans and making a move needs no copy
+
+# Bits of every row, column and diagonal, and of a full board
+WIN_MASKS = [sum(1 << cell for cell in line) for line in LINES]
+FULL = (1 << 9) - 1
+
+
+def to_bitboard(board):
+    """
+    Returns the (x, o) bitboards of a list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def from_bitboard(x, o):
+    """
+    Returns the list board of (x, o) bitboards.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def bit_player(x, o):
+    """
+    Returns player who has the next turn on a bitboard.
+    """
+    return X if bin(x).count("1") == bin(o).count("1") else O
+
+
+def bit_actions(x, o):
+    """
+    Returns the list of empty cell indices of a bitboard.
+    """
+    empty = FULL & ~(x | o)
+    return [cell for cell in MOVE_ORDER if empty >> cell & 1]
+
+
+def bit_result(x, o, cell):
+    """
+    Returns the bitboard after the current player marks `cell`.
+    """
+    if (x | o) >> cell & 1:
+        raise ActionError("Invalid Action")
+    if bit_player(x, o) == X:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def bit_winner(x, o):
+    """
+    Returns the winner of a bitboard, if there is one.
+    """
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def bit_terminal(x, o):
+    """
+    Returns True if the game on a bitboard is over.
+    """
+    return (x | o) == FULL or bit_winner(x, o) is not None
+
+
+def bit_utility(x, o):
+    """
+    Returns 1 if X has won a bitboard, -1 if O has won, 0 otherwise.
+    """
+    Winner = bit_winner(x, o)
+    return 1 if Winner == X else -1 if Winner == O else 0
+
+
+@lru_cache(maxsize=None)
+def bit_value(x, o):
+    """
+    Returns the minimax value (1, 0 or -1 for X) of a bitboard.
+    """
+    if bit_terminal(x, o):
+        return bit_utility(x, o)
+    values = [bit_value(*bit_result(x, o, cell)) for cell in bit_actions(x, o)]
+    return max(values) if bit_player(x, o) == X else min(values)
+
+
+def bitboard_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    solving it as a memoized bitboard.
+    """
+    misses = bit_value.cache_info().misses
+    x, o = to_bitboard(board)
+    if bit_terminal(x, o):
+        return None
+
+    currentPlayer = bit_player(x, o)
+    best_move = None
+    for cell in bit_actions(x, o):
+        k = bit_value(*bit_result(x, o, cell))
+        if (best_move is None or (currentPlayer == X and k > v)
+                or (currentPlayer == O and k < v)):
+            v = k
+            best_move = (cell // 3, cell % 3)
+    if stats is not None:
+        stats["nodes"] = (stats.get("nodes", 0)
+                          + bit_value.cache_info().misses - misses)
+    return best_move
+
+
+def book_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board
+    from the precomputed opening book, loading it on first use.
+    """
+    import book
+    return book.book_move(board)
+
+
+# Search engines selectable by name in minimax
+ENGINES = {
+    "book": book_minimax,
+    "memoized": memoized_minimax,
+    "symmetric": symmetric_minimax,
+    "alphabeta": alphabeta_minimax,
+    "bitboard": bitboard_minimax,
+    "full": full_minimax,
+}
+
+
+def compare_engines(board):
+    """
+    Returns (engine, move, nodes, seconds) for every engine on the board,
+    starting each memoized run from an empty cache.
+    """
+    rows = []
+    for engine in ENGINES:
+        solved_value.cache_clear()
+        symmetric_value.cache_clear()
+        bit_value.cache_clear()
+        stats = {}
+        start = time.perf_counter()
+        move = minimax(board, engine, stats)
+        rows.append((engine, move, stats.get("nodes", 0),
+                     time.perf_counter() - start))
+    return rows
+
+
+if __name__ == "__main__":
+    rows = compare_engines(initial_state())
+    for engine, move, nodes, seconds in rows:
+        print(f"{engine:>10}: move {move}, {nodes} nodes, {seconds:.3f}s")
+
+    # Positions explored with and without symmetry reduction
+    nodes = {engine: nodes for engine, _, nodes, _ in rows}
+    print(f"symmetry reduction: {nodes['memoized']} -> "
+          f"{nodes['symmetric']} positions "
+          f"({nodes['memoized'] / nodes['symmetric']:.1f}x fewer)")
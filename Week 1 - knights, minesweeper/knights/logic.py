@@ -1,7 +1,48 @@
+import functools
 import itertools
+import threading
+import weakref
+
+from sat import Solver
 
 
 class Sentence():
+    """
+    Sentences are immutable and hash-consed: constructing a sentence equal
+    to one that already exists returns the existing object, so equality is
+    identity, and hashes and symbol sets are computed once per sentence.
+    """
+
+    __slots__ = ("arguments", "_hash", "_symbols", "__weakref__")
+
+    # Live sentences keyed by class and constructor arguments, and the lock
+    # that keeps threads from interning two copies of the same sentence
+    interned = weakref.WeakValueDictionary()
+    interning = threading.Lock()
+
+    def __new__(cls, *arguments):
+        key = (cls, arguments)
+        with Sentence.interning:
+            sentence = Sentence.interned.get(key)
+            if sentence is None:
+                sentence = object.__new__(cls)
+                object.__setattr__(sentence, "arguments", arguments)
+                object.__setattr__(sentence, "_hash", hash(key))
+                object.__setattr__(sentence, "_symbols", None)
+                Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.arguments)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +53,27 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[argument.symbols() for argument in self.arguments]
+            ))
+        return self._symbols
+
+    def source(self, slots):
+        """
+        Returns a Python expression for the sentence on a model bitmask `m`,
+        where bit `slots[name]` holds the value of each symbol.
+        """
+        raise Exception("nothing to compile")
+
+    def vector(self, columns, full):
+        """
+        Evaluates the sentence on a block of models at once. Bit i of
+        `columns[name]` is the value of a symbol in model i, and `full`
+        has a bit set for every model; returns the bits of true models.
+        """
+        raise Exception("nothing to evaluate")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +103,14 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ()
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return super().__new__(cls, name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    @property
+    def name(self):
+        return self.arguments[0]
 
     def __repr__(self):
         return self.name
@@ -66,19 +125,27 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset([self.name]))
+        return self._symbols
+
+    def source(self, slots):
+        return f"(m & {1 << slots[self.name]})"
+
+    def vector(self, columns, full):
+        return columns[self.name]
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return super().__new__(cls, operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    @property
+    def operand(self):
+        return self.arguments[0]
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +156,24 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def source(self, slots):
+        return f"(not {self.operand.source(slots)})"
+
+    def vector(self, columns, full):
+        return full ^ self.operand.vector(columns, full)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ()
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return super().__new__(cls, *conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    @property
+    def conjuncts(self):
+        return self.arguments
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +182,12 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("sentences are immutable; "
+                        "use knowledge = knowledge.with_conjunct(sentence)")
+
+    def with_conjunct(self, conjunct):
+        """Returns a new conjunction with one more conjunct."""
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +198,32 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def source(self, slots):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.source(slots)
+                                  for conjunct in self.conjuncts) + ")"
+
+    def vector(self, columns, full):
+        result = full
+        for conjunct in self.conjuncts:
+            result &= conjunct.vector(columns, full)
+            if not result:
+                break
+        return result
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ()
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return super().__new__(cls, *disjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    @property
+    def disjuncts(self):
+        return self.arguments
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +238,36 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def source(self, slots):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.source(slots)
+                                 for disjunct in self.disjuncts) + ")"
+
+    def vector(self, columns, full):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.vector(columns, full)
+            if result == full:
+                break
+        return result
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ()
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return super().__new__(cls, antecedent, consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    @property
+    def antecedent(self):
+        return self.arguments[0]
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    @property
+    def consequent(self):
+        return self.arguments[1]
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +281,31 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def source(self, slots):
+        antecedent = self.antecedent.source(slots)
+        consequent = self.consequent.source(slots)
+        return f"(not {antecedent} or {consequent})"
+
+    def vector(self, columns, full):
+        return ((full ^ self.antecedent.vector(columns, full))
+                | self.consequent.vector(columns, full))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ()
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return super().__new__(cls, left, right)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    @property
+    def left(self):
+        return self.arguments[0]
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    @property
+    def right(self):
+        return self.arguments[1]
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,13 +321,53 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def source(self, slots):
+        left = self.left.source(slots)
+        right = self.right.source(slots)
+        return f"((not {left}) == (not {right}))"
+
+    def vector(self, columns, full):
+        return full ^ (self.left.vector(columns, full)
+                       ^ self.right.vector(columns, full))
+
 
+def compile_sentence(sentence, slots):
+    """
+    Returns a function evaluating the sentence on a model bitmask,
+    where bit `slots[name]` holds the value of each symbol.
+    """
+    return _compile(sentence, tuple(slots.items()))
 
-def model_check(knowledge, query):
+
+@functools.lru_cache(maxsize=256)
+def _compile(sentence, slots):
+    # Cached on structure, so a knowledge base is compiled once per query set
+    slots = dict(slots)
+    try:
+        return eval(f"lambda m: bool({sentence.source(slots)})")
+    except (SyntaxError, RecursionError, MemoryError):
+
+        # Too deeply nested for Python to compile, so walk the tree instead
+        return lambda m: sentence.evaluate(
+            {name: bool(m >> slot & 1) for name, slot in slots.items()}
+        )
+
+
+def model_check(knowledge, query, compiled=True):
     """Checks if knowledge base entails query."""
 
+    if compiled:
+
+        # Enumerate models as bitmasks, one bit per symbol
+        symbols = knowledge.symbols() | query.symbols()
+        slots = {symbol: slot for slot, symbol in enumerate(sorted(symbols))}
+        knowledge_true = compile_sentence(knowledge, slots)
+        query_true = compile_sentence(query, slots)
+        for model in range(1 << len(slots)):
+            if knowledge_true(model) and not query_true(model):
+                return False
+        return True
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
@@ -257,7 +397,127 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+class CNF():
+    """Clauses over integer literals, encoded from sentences by Tseitin."""
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name=None):
+        """Returns the variable of a symbol name, or a fresh one."""
+        if name is not None and name in self.variables:
+            return self.variables[name]
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to a sentence under the clauses."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(part) for part in sentence.conjuncts]
+            x = self.variable()
+            self.clauses.extend([-x, part] for part in parts)
+            self.clauses.append([x] + [-part for part in parts])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                parts = [self.literal(part) for part in sentence.disjuncts]
+            else:
+                parts = [-self.literal(sentence.antecedent),
+                         self.literal(sentence.consequent)]
+            x = self.variable()
+            self.clauses.extend([x, -part] for part in parts)
+            self.clauses.append([-x] + parts)
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.variable()
+            self.clauses.extend([[-x, -a, b], [-x, a, -b],
+                                 [x, a, b], [x, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.literals[sentence] = x
+        return x
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query, using a SAT solver."""
+
+    # Knowledge entails query when knowledge and not query is unsatisfiable
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf.count, cnf.clauses).solve()
+
+
+def vector_check(knowledge, query, block_bits=16):
+    """
+    Checks if knowledge base entails query, evaluating blocks of
+    2 ** block_bits models at once as bits of Python integers.
+    """
+    return model_check_all(knowledge, [query], block_bits)[0]
+
+
+def model_check_all(knowledge, queries, block_bits=16):
+    """
+    Returns a list telling whether knowledge base entails each query,
+    enumerating the models of the knowledge base only once.
+    """
+
+    # The first symbols vary within a block, the rest between blocks
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    inner = symbols[:block_bits]
+    outer = symbols[block_bits:]
+    size = 1 << len(inner)
+    full = (1 << size) - 1
+
+    # Symbol j is true in the upper half of every run of 2 ** (j + 1) models
+    columns = {}
+    for j, symbol in enumerate(inner):
+        half = 1 << j
+        run = ((1 << half) - 1) << half
+        columns[symbol] = run * (full // ((1 << 2 * half) - 1))
+
+    results = [True] * len(queries)
+    open_queries = list(range(len(queries)))
+    for block in range(1 << len(outer)):
+        for j, symbol in enumerate(outer):
+            columns[symbol] = full if block >> j & 1 else 0
+        models = knowledge.vector(columns, full)
+        if not models:
+            continue
+
+        # A query is not entailed once a model of knowledge falsifies it
+        for i in list(open_queries):
+            if models & ~queries[i].vector(columns, full):
+                results[i] = False
+                open_queries.remove(i)
+        if not open_queries:
+            break
+    return results
@@ -0,0 +1,236 @@
+"""
+CDCL SAT solver over clauses in conjunctive normal form.
+
+Variables are the integers 1..n and a literal is a variable or its
+negation, as in DIMACS files. The solver propagates units with two watched
+literals per clause, learns a first-UIP clause from every conflict, picks
+decisions by VSIDS activity with saved phases, and restarts on the Luby
+sequence.
+"""
+
+import heapq
+
+
+class Solver():
+
+    def __init__(self, variables=0, clauses=()):
+        self.values = [None] * (variables + 1)
+        self.levels = [0] * (variables + 1)
+        self.reasons = [None] * (variables + 1)
+        self.phases = [False] * (variables + 1)
+        self.activity = [0.0] * (variables + 1)
+        self.increment = 1.0
+        self.order = [(0.0, var) for var in range(1, variables + 1)]
+
+        # Assigned literals in order, the trail position at which each
+        # decision level starts, and the next literal to propagate
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        # Maps each literal to the clauses watching it
+        self.watches = {}
+        self.conflicts = 0
+        self.ok = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        """Returns the truth value of a literal, or None if unassigned."""
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, clause):
+        """Adds a clause, given as literals, before solving."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        clause = [literal for literal in clause
+                  if self.value(literal) is not False]
+        if any(self.value(literal) for literal in clause):
+            return
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.ok and self.propagate() is None
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Watches the first two literals of a clause."""
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        """Makes a literal true at the current level, implied by reason."""
+        var = abs(literal)
+        self.values[var] = literal > 0
+        self.levels[var] = len(self.limits)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns a conflicting clause, or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for index, clause in enumerate(watching):
+
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if self.value(first):
+                    kept.append(clause)
+                    continue
+
+                # Move the watch to another literal that is not false
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) is False:
+                        kept.extend(watching[index + 1:])
+                        self.watches[false] = kept
+                        return clause
+                    self.assign(first, clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, asserting
+        literal first, and the level to backtrack to.
+        """
+        level = len(self.limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                var = abs(other)
+                if other == literal or var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest assigned literal of the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        # Watch the literal of the highest remaining level second
+        backtrack = 0
+        for k in range(1, len(learned)):
+            if self.levels[abs(learned[k])] > backtrack:
+                backtrack = self.levels[abs(learned[k])]
+                learned[1], learned[k] = learned[k], learned[1]
+        return learned, backtrack
+
+    def backtrack(self, level):
+        """Undoes every assignment above a decision level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phases[var] = literal > 0
+            self.values[var] = None
+            self.reasons[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def bump(self, var):
+        """Raises the activity of a variable seen in a conflict."""
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-activity, var) for var, activity
+                          in enumerate(self.activity) if var]
+            heapq.heapify(self.order)
+        elif self.values[var] is None:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def decide(self):
+        """Returns the unassigned variable of highest activity, or None."""
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if self.values[var] is None and -activity == self.activity[var]:
+                return var
+        return None
+
+    def solve(self):
+        """Returns True if the clauses are satisfiable, False otherwise."""
+        if not self.ok:
+            return False
+        restart = 1
+        budget = 100 * luby(restart)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= 0.95
+                self.conflicts += 1
+                budget -= 1
+                if budget == 0:
+                    self.backtrack(0)
+                    restart += 1
+                    budget = 100 * luby(restart)
+            else:
+                var = self.decide()
+                if var is None:
+                    return True
+                self.limits.append(len(self.trail))
+                self.assign(var if self.phases[var] else -var, None)
+
+    def model(self):
+        """Returns a dict mapping each variable to its value after solve."""
+        return {var: bool(value) for var, value in enumerate(self.values)
+                if var}
+
+
+def luby(i):
+    """Returns the i-th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ..."""
+    while True:
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+        if (1 << k) - 1 == i:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1